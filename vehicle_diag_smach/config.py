@@ -16,6 +16,10 @@ DTC_TMP_FILE = "dtc_tmp.json"
 FAULT_PATH_TMP_FILE = "fault_paths_tmp.json"
 SUS_COMP_TMP_FILE = "sus_comp_tmp.json"
 TRAINED_MODEL_POOL = "res/trained_model_pool/"
+# heatmap generation (visual explanations of the classifications) requires additional passes through the models
+GEN_HEATMAPS = True
+# artificial pauses (waiting for user input) after each provided piece of information - for presentation purposes
+DEMO_PAUSES = False
 
 DUMMY_OSCILLOGRAMS = "res/dummy_oscillograms/"
 DUMMY_ISOLATION_OSCILLOGRAM_POS = "res/dummy_isolation_oscillogram/dummy_isolation_POS.csv"
@@ -55,7 +55,7 @@ class VehicleDiagnosisStateMachine(smach.StateMachine):
         with self:
             self.add('REC_VEHICLE_AND_PROC_METADATA', RecVehicleAndProcMetadata(self.data_accessor, self.data_provider),
                      transitions={'processed_metadata': 'PROC_CUSTOMER_COMPLAINTS'},
-                     remapping={'input': 'sm_input', 'user_data': 'sm_input'})
+                     remapping={'input': 'sm_input', 'user_data': 'sm_input', 'obd_data': 'obd_data'})
 
             self.add('PROC_CUSTOMER_COMPLAINTS', ProcCustomerComplaints(self.data_accessor, self.data_provider),
                      transitions={'received_complaints': 'READ_OBD_DATA_AND_GEN_ONTOLOGY_INSTANCES',
@@ -66,7 +66,8 @@ class VehicleDiagnosisStateMachine(smach.StateMachine):
                      ReadOBDDataAndGenOntologyInstances(self.data_accessor, self.data_provider, self.kg_url),
                      transitions={'processed_OBD_data': 'RETRIEVE_HISTORICAL_DATA',
                                   'no_DTC_data': 'ESTABLISH_INITIAL_HYPOTHESIS'},
-                     remapping={'interview_data': 'sm_input', 'vehicle_specific_instance_data': 'sm_input'})
+                     remapping={'interview_data': 'sm_input', 'vehicle_specific_instance_data': 'sm_input',
+                                'obd_data': 'obd_data'})
 
             self.add('ESTABLISH_INITIAL_HYPOTHESIS', EstablishInitialHypothesis(self.data_provider, self.kg_url),
                      transitions={'established_init_hypothesis': 'DIAGNOSIS',
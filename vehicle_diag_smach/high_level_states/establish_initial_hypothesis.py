@@ -3,13 +3,13 @@
 # @author Tim Bohne
 
 import json
-import os
+from typing import Optional
 
 import smach
-from bs4 import BeautifulSoup
-from obd_ontology import ontology_instance_generator, knowledge_graph_query_tool
-from termcolor import colored
+from lxml import etree
+from obd_ontology import knowledge_graph_query_tool
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.config import SESSION_DIR, XPS_SESSION_FILE, HISTORICAL_INFO_FILE, CC_TMP_FILE, OBD_INFO_FILE
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_provider import DataProvider
@@ -33,7 +33,7 @@ class EstablishInitialHypothesis(smach.State):
                              input_keys=['vehicle_specific_instance_data'],
                              output_keys=['hypothesis'])
         self.data_provider = data_provider
-        self.instance_gen = ontology_instance_generator.OntologyInstanceGenerator(kg_url=kg_url)
+        self.instance_gen = util.get_ontology_instance_generator(kg_url)
         self.qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
 
     @staticmethod
@@ -41,27 +41,55 @@ class EstablishInitialHypothesis(smach.State):
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("ESTABLISH_INITIAL_HYPOTHESIS", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################")
+        util.log_state_banner("ESTABLISH_INITIAL_HYPOTHESIS")
+
+    @staticmethod
+    def parse_initial_hypothesis(session_file: str) -> Optional[str]:
+        """
+        Parses the initial hypothesis from the specified customer complaints session file.
+
+        The hypothesis is the `objectName` of the element containing the first heuristic rating. In contrast to the
+        previously used BeautifulSoup parser, lxml does not repair malformed XML, i.e., it raises an `XMLSyntaxError`
+        if the session file turns out to be malformed (or truncated) before the first heuristic rating.
+
+        :param session_file: path to the customer complaints session file
+        :return: initial hypothesis based on customer complaints (`None` if there is no heuristic rating)
+        """
+        # stream the session file - only the first heuristic rating is of interest, i.e., stop parsing there
+        # (opened explicitly, since lxml would keep the file open when stopping early)
+        with open(session_file, 'rb') as f:
+            # '{*}' -> also matches ratings in a (default) namespace
+            for _, elem in etree.iterparse(f, events=('end',), tag='{*}rating'):
+                solution = elem.getparent()
+                # free the memory of already processed solutions, i.e., drop the references kept by their parent
+                while solution.getprevious() is not None:
+                    del solution.getparent()[0]
+                if elem.get('type') == 'heuristic':
+                    return solution.get('objectName')
+                # same for already processed ratings of the current solution
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del solution[0]
+        return None
 
     @staticmethod
     def read_initial_hypothesis() -> str:
         """
         Reads the initial hypothesis from the session directory (customer complaints).
+        A malformed session file is treated like missing customer complaints.
 
-        :return: initial hypothesis based on customer complaints
+        :return: initial hypothesis based on customer complaints (empty if not available)
         """
+        session_file = SESSION_DIR + "/" + XPS_SESSION_FILE
         try:
-            with open(SESSION_DIR + "/" + XPS_SESSION_FILE) as f:
-                data = f.read()
-                session_data = BeautifulSoup(data, 'xml')
-                for tag in session_data.find_all('rating', {'type': 'heuristic'}):
-                    return tag.parent['objectName']
+            initial_hypothesis = EstablishInitialHypothesis.parse_initial_hypothesis(session_file)
         except FileNotFoundError:
             print("no customer complaints available..")
             return ""
+        except etree.XMLSyntaxError as e:
+            util.log_err("malformed customer complaints session file: " + str(e))
+            return ""
+        return initial_hypothesis if initial_hypothesis is not None else ""
 
     def handle_insufficient_data(self) -> None:
         """
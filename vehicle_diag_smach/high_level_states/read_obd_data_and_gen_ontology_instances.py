@@ -3,12 +3,10 @@
 # @author Tim Bohne
 
 import json
-import os
 
 import smach
-from obd_ontology import ontology_instance_generator
-from termcolor import colored
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.config import SESSION_DIR, OBD_INFO_FILE, DTC_TMP_FILE
 from vehicle_diag_smach.data_types.onboard_diagnosis_data import OnboardDiagnosisData
 from vehicle_diag_smach.data_types.state_transition import StateTransition
@@ -33,22 +31,18 @@ class ReadOBDDataAndGenOntologyInstances(smach.State):
         """
         smach.State.__init__(self,
                              outcomes=['processed_OBD_data', 'no_DTC_data'],
-                             input_keys=[''],
+                             input_keys=['obd_data'],
                              output_keys=['vehicle_specific_instance_data'])
         self.data_accessor = data_accessor
         self.data_provider = data_provider
-        self.instance_gen = ontology_instance_generator.OntologyInstanceGenerator(kg_url=kg_url)
+        self.instance_gen = util.get_ontology_instance_generator(kg_url)
 
     @staticmethod
     def log_state_info() -> None:
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("READ_OBD_DATA_AND_GEN_ONTOLOGY_INSTANCES", "yellow", "on_grey", ["bold"]),
-              "state..")
-        print("############################################")
+        util.log_state_banner("READ_OBD_DATA_AND_GEN_ONTOLOGY_INSTANCES")
 
     @staticmethod
     def write_obd_data_to_session_file(obd_data: OnboardDiagnosisData) -> None:
@@ -79,7 +73,10 @@ class ReadOBDDataAndGenOntologyInstances(smach.State):
         :return: outcome of the state ("processed_OBD_data" | "no_DTC_data")
         """
         self.log_state_info()
-        obd_data = self.data_accessor.get_obd_data()
+        # OBD data is read concurrently to the previous states (started in 'REC_VEHICLE_AND_PROC_METADATA')
+        obd_data = userdata.obd_data.result()
+        print(obd_data)
+        util.artificial_demo_pause()
         self.write_obd_data_to_session_file(obd_data)
 
         # extend knowledge graph with read OBD data
@@ -5,10 +5,12 @@
 import json
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 import smach
 from termcolor import colored
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.config import SESSION_DIR, CLASSIFICATION_LOG_FILE
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.data_types.workshop_data import WorkshopData
@@ -29,18 +31,18 @@ class RecVehicleAndProcMetadata(smach.State):
         :param data_accessor: implementation of the data accessor interface
         :param data_provider: implementation of the data provider interface
         """
-        smach.State.__init__(self, outcomes=['processed_metadata'], input_keys=[''], output_keys=[''])
+        smach.State.__init__(self, outcomes=['processed_metadata'], input_keys=[''], output_keys=['obd_data'])
         self.data_accessor = data_accessor
         self.data_provider = data_provider
+        # reads the OBD data in the background (see `execute()`)
+        self.obd_data_reader = ThreadPoolExecutor(max_workers=1)
 
     @staticmethod
     def log_state_info() -> None:
         """
         Logs the state information.
         """
-        print("\n\n############################################")
-        print("executing", colored("REC_VEHICLE_AND_PROC_METADATA", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################\n")
+        util.log_state_banner("REC_VEHICLE_AND_PROC_METADATA", clear=False)
 
     @staticmethod
     def create_session_dir() -> None:
@@ -90,6 +92,9 @@ class RecVehicleAndProcMetadata(smach.State):
         self.init_classification_log()
         # TODO: save workshop info in KG
         self.write_metadata_to_session_dir(workshop_info)
+        # the OBD data is required in any case (both outcomes of 'PROC_CUSTOMER_COMPLAINTS' lead to
+        # 'READ_OBD_DATA_AND_GEN_ONTOLOGY_INSTANCES') -> read it concurrently to the processing of customer complaints
+        userdata.obd_data = self.obd_data_reader.submit(self.data_accessor.get_obd_data)
         self.data_provider.provide_state_transition(StateTransition(
             "REC_VEHICLE_AND_PROC_METADATA", "PROC_CUSTOMER_COMPLAINTS", "processed_metadata"
         ))
@@ -2,13 +2,13 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
-import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import smach
 from obd_ontology import knowledge_graph_query_tool
-from termcolor import colored
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.config import SESSION_DIR, HISTORICAL_INFO_FILE
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_provider import DataProvider
@@ -34,16 +34,15 @@ class RetrieveHistoricalData(smach.State):
                              output_keys=['vehicle_specific_instance_data_out'])
         self.data_provider = data_provider
         self.qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
+        # separate query tool for the model-based query, which runs concurrently to the VIN-based one
+        self.model_qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
 
     @staticmethod
     def log_state_info() -> None:
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("RETRIEVE_HISTORICAL_DATA", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################\n")
+        util.log_state_banner("RETRIEVE_HISTORICAL_DATA")
 
     @staticmethod
     def write_historical_info_to_session_dir(vin: str, historic_dtcs_by_vin: List[str], model: str,
@@ -57,8 +56,8 @@ class RetrieveHistoricalData(smach.State):
         :param historic_dtcs_by_model: DTCs previously recorded in instances of the considered model
         """
         with open(SESSION_DIR + "/" + HISTORICAL_INFO_FILE, "w") as f:
-            f.write("DTCs previously recorded in car with VIN " + vin + ": " + str(historic_dtcs_by_vin) + "\n")
-            f.write("DTCs previously recorded in cars of model " + model + ": " + str(historic_dtcs_by_model) + "\n")
+            f.write(f"DTCs previously recorded in car with VIN {vin}: {historic_dtcs_by_vin}\n"
+                    f"DTCs previously recorded in cars of model {model}: {historic_dtcs_by_model}\n")
 
     def execute(self, userdata: smach.user_data.Remapper) -> str:
         """
@@ -76,10 +75,14 @@ class RetrieveHistoricalData(smach.State):
         model = userdata.vehicle_specific_instance_data_in.model
 
         # TODO: potentially retrieve more historical information (not only DTCs)
-        historic_dtcs_by_vin = self.qt.query_dtcs_by_vin(vin)
+        # both queries are independent of each other -> run them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            dtcs_by_vin_future = executor.submit(self.qt.query_dtcs_by_vin, vin)
+            dtcs_by_model_future = executor.submit(self.model_qt.query_dtcs_by_model, model)
+            historic_dtcs_by_vin = dtcs_by_vin_future.result()
+            historic_dtcs_by_model = dtcs_by_model_future.result()
         print("DTCs previously recorded in present car:", historic_dtcs_by_vin)
         print("\nmodel to retrieve historical data for:", model, "\n")
-        historic_dtcs_by_model = self.qt.query_dtcs_by_model(model)
         print("DTCs previously recorded in model of present car:", historic_dtcs_by_model)
 
         self.write_historical_info_to_session_dir(vin, historic_dtcs_by_vin, model, historic_dtcs_by_model)
@@ -29,6 +29,7 @@ class DataAccessor(ABC):
     def get_obd_data(self) -> OnboardDiagnosisData:
         """
         Retrieves the on-board diagnosis data required in the diagnostic process.
+        Called concurrently to the processing of customer complaints, i.e., it must not interact with the user.
 
         :return: on-board diagnosis data
         """
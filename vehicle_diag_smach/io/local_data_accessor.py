@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
+import atexit
 import json
 import os
 import random
@@ -12,10 +13,10 @@ from typing import List
 
 import pandas as pd
 from oscillogram_classification import preprocess
-from py4j.java_gateway import JavaGateway
+from py4j.java_gateway import JavaGateway, JavaObject
 
 from vehicle_diag_smach.config import OSCI_SESSION_FILES, FINAL_DEMO_TEST_SAMPLES, SEED, SELECTED_OSCILLOGRAMS, \
-    VEHICLE_DATA, WORKSHOP_DATA, ONLY_NEG_SAMPLES, SYNC_SAMPLES
+    VEHICLE_DATA, WORKSHOP_DATA, ONLY_NEG_SAMPLES, SYNC_SAMPLES, DEMO_PAUSES
 from vehicle_diag_smach.config import SESSION_DIR, XPS_SESSION_FILE
 from vehicle_diag_smach.data_types.customer_complaint_data import CustomerComplaintData
 from vehicle_diag_smach.data_types.onboard_diagnosis_data import OnboardDiagnosisData
@@ -30,7 +31,21 @@ class LocalDataAccessor(DataAccessor):
     """
 
     def __init__(self):
-        pass
+        self.customer_xps_gateway = None
+
+    def get_customer_xps(self) -> JavaObject:
+        """
+        Retrieves the entry point of the customer XPS server.
+        The gateway is established on first use and then reused, i.e., the connection setup is only performed once.
+
+        :return: entry point of the customer XPS server
+        """
+        if self.customer_xps_gateway is None:
+            print("establish connection to customer XPS server..")
+            self.customer_xps_gateway = JavaGateway()
+            # only closes the connection, the XPS server itself keeps running
+            atexit.register(self.customer_xps_gateway.close)
+        return self.customer_xps_gateway.entry_point
 
     def get_workshop_info(self) -> WorkshopData:
         """
@@ -38,9 +53,10 @@ class LocalDataAccessor(DataAccessor):
 
         :return: workshop metadata
         """
-        val = None
-        while val != "":
-            val = input("\nlocal interface impl.: simulation of mechanic providing these information..")
+        if DEMO_PAUSES:  # the workshop data is read from a local file -> only simulate the mechanic in demo mode
+            val = None
+            while val != "":
+                val = input("\nlocal interface impl.: simulation of mechanic providing these information..")
 
         with open(WORKSHOP_DATA, 'r') as file:
             data = json.load(file)
@@ -52,17 +68,12 @@ class LocalDataAccessor(DataAccessor):
 
         :return: on-board diagnosis data
         """
-        val = None
-        while val != "":
-            val = input("\nlocal interface impl.: sim processing OBD data..")
-
+        # read concurrently to the processing of customer complaints -> no user interaction / output here
         with open(VEHICLE_DATA, 'r') as file:
             data = json.load(file)
-            obd_data = OnboardDiagnosisData(
+            return OnboardDiagnosisData(
                 data["dtc_list"], data["model"], data["hsn"], data["tsn"], data["vin"]
             )
-        print(obd_data)
-        return obd_data
 
     @staticmethod
     def create_local_dummy_oscillograms() -> None:
@@ -91,10 +102,11 @@ class LocalDataAccessor(DataAccessor):
         :param components: components to retrieve oscillograms for
         :return: oscillogram data for each component
         """
-        val = None
-        while val != "":
-            val = input("\nlocal interface impl.: sim mechanic - press 'ENTER' when the recording phase is finished"
-                        + " and the oscillograms are generated for " + str(components))
+        if DEMO_PAUSES:  # the dummy oscillograms are available right away -> only simulate the recording in demo mode
+            val = None
+            while val != "":
+                val = input("\nlocal interface impl.: sim mechanic - press 'ENTER' when the recording phase is finished"
+                            + " and the oscillograms are generated for " + str(components))
         self.create_local_dummy_oscillograms()
         oscillograms = []
         for comp in components:
@@ -140,14 +152,15 @@ class LocalDataAccessor(DataAccessor):
 
         :return: customer complaints
         """
-        val = ""
-        while val != "0" and val != "1":
-            val = input("\nlocal interface impl.: starting diagnosis with [0] / without [1] customer complaints")
+        val = None
+        while val not in ("0", "1"):
+            val = input(
+                "\nlocal interface impl.: starting diagnosis with [0] / without [1] customer complaints"
+            ).strip()
 
         if val == "0":
             # launch expert system that processes the customer complaints
-            print("establish connection to customer XPS server..")
-            customer_xps = JavaGateway().entry_point
+            customer_xps = self.get_customer_xps()
             print("result of customer xps: ",
                   customer_xps.demo("../vehicle_diag_smach/" + SESSION_DIR + "/" + XPS_SESSION_FILE))
             return CustomerComplaintData(SESSION_DIR + "/" + XPS_SESSION_FILE)
@@ -162,9 +175,11 @@ class LocalDataAccessor(DataAccessor):
         :return: true -> anomaly, false -> regular
         """
         print("local interface impl.: manual inspection of component:", component)
-        val = ""
-        while val not in ['0', '1']:
-            val = input("\nsim mechanic - press '0' for defective component, i.e., anomaly, and '1' for no defect..")
+        val = None
+        while val not in ("0", "1"):
+            val = input(
+                "\nsim mechanic - press '0' for defective component, i.e., anomaly, and '1' for no defect.."
+            ).strip()
         return val == "0"
 
     def get_manual_judgement_for_sensor(self) -> bool:
@@ -174,7 +189,7 @@ class LocalDataAccessor(DataAccessor):
         :return: true -> anomaly, false -> regular
         """
         print("no anomaly identified -- check potential sensor malfunction..")
-        val = ""
-        while val not in ['0', '1']:
-            val = input("\npress '0' for sensor malfunction and '1' for working sensor..")
+        val = None
+        while val not in ("0", "1"):
+            val = input("\npress '0' for sensor malfunction and '1' for working sensor..").strip()
         return val == "0"
@@ -2,13 +2,15 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
-from typing import Union, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Union, Tuple, Optional
 
 import torch
 from obd_ontology import knowledge_graph_query_tool
 from tensorflow import keras
 
-from vehicle_diag_smach.config import TRAINED_MODEL_POOL, FINAL_DEMO_MODELS, KG_URL
+from vehicle_diag_smach.config import TRAINED_MODEL_POOL, FINAL_DEMO_MODELS, KG_URL, FINAL_DEMO_TEST_SAMPLES
 from vehicle_diag_smach.interfaces.model_accessor import ModelAccessor
 from vehicle_diag_smach.interfaces.rule_based_model import RuleBasedModel
 from vehicle_diag_smach.rule_based_models.Lambdasonde import Lambdasonde
@@ -20,8 +22,39 @@ class LocalModelAccessor(ModelAccessor):
     Implementation of the model accessor interface using local model files.
     """
 
-    def __init__(self):
+    def __init__(self, preload_torch_models: Optional[bool] = None) -> None:
+        """
+        Initializes the local model accessor.
+
+        :param preload_torch_models: whether the torch models of the demo should be preloaded in the background (by
+                                     default only if the multivariate demo data is configured)
+        """
+        if preload_torch_models is None:
+            preload_torch_models = "multivariate" in FINAL_DEMO_TEST_SAMPLES
         self.qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=KG_URL)
+        # trained keras models are only loaded once per component and reused in subsequent classifications
+        self.keras_models: Dict[str, keras.models.Model] = {}
+        # trained torch models are loaded in the background and reused in subsequent classifications
+        self.model_loader = ThreadPoolExecutor(max_workers=1)
+        self.torch_models: Dict[str, Future] = {}
+        if preload_torch_models:  # the (few) torch models of the demo -> warm when the classification starts
+            self.torch_models = {
+                path.stem: self.model_loader.submit(self.load_torch_model, str(path))
+                for path in Path(FINAL_DEMO_MODELS).glob("*.pth")
+            }
+
+    @staticmethod
+    def load_torch_model(trained_model_file: str) -> torch.nn.Module:
+        """
+        Loads the specified trained torch model.
+
+        :param trained_model_file: file containing the trained torch model
+        :return: trained torch model (in evaluation mode)
+        """
+        model = torch.load(trained_model_file)
+        # ensure model is in evaluation mode
+        model.eval()
+        return model
 
     def get_keras_univariate_ts_classification_model_by_component(
             self, component: str
@@ -48,7 +81,9 @@ class LocalModelAccessor(ModelAccessor):
                 "model_id": "keras_univariate_ts_classification_model_001",
                 "input_length": 23040
             }
-            return keras.models.load_model(trained_model_file), model_meta_info
+            if component not in self.keras_models:
+                self.keras_models[component] = keras.models.load_model(trained_model_file)
+            return self.keras_models[component], model_meta_info
         except OSError as e:
             print("no trained model available for the signal (component) to be classified:", component)
             print("ERROR:", e)
@@ -97,10 +132,12 @@ class LocalModelAccessor(ModelAccessor):
             # obtain meta info from the KG
             norm, model_id, input_len = self.qt.query_xcm_model_meta_info_by_component(component)[0]
             model_meta_info = {"normalization_method": norm, "model_id": model_id, "input_length": int(input_len)}
-            model = torch.load(trained_model_file)
-            # ensure model is in evaluation mode
-            model.eval()
-            return model, model_meta_info
+            if component not in self.torch_models:
+                self.torch_models[component] = self.model_loader.submit(self.load_torch_model, trained_model_file)
+            model = self.torch_models[component]
+            if model.exception() is not None:  # failed loads are not reused, i.e., the next request loads again
+                del self.torch_models[component]
+            return model.result(), model_meta_info
         except OSError as e:
             print("no trained model available for the signal (component) to be classified:", component)
             print("ERROR:", e)
@@ -3,22 +3,18 @@
 # @author Tim Bohne
 
 import json
-import os
 from typing import List, Dict, Tuple
 
 import numpy as np
 import pandas as pd
 import smach
 import torch
-from obd_ontology import ontology_instance_generator, knowledge_graph_query_tool
-from oscillogram_classification import cam
+from obd_ontology import knowledge_graph_query_tool
 from tensorflow import keras
 from termcolor import colored
-from tsai.all import get_attribution_map
-from tsai.models.XCM import XCM
 
 from vehicle_diag_smach import util
-from vehicle_diag_smach.config import SESSION_DIR, SUGGESTION_SESSION_FILE, CLASSIFICATION_LOG_FILE
+from vehicle_diag_smach.config import SESSION_DIR, SUGGESTION_SESSION_FILE, CLASSIFICATION_LOG_FILE, GEN_HEATMAPS
 from vehicle_diag_smach.data_types.oscillogram_data import OscillogramData
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_accessor import DataAccessor
@@ -53,8 +49,10 @@ class ClassifyComponents(smach.State):
         self.model_accessor = model_accessor
         self.data_accessor = data_accessor
         self.data_provider = data_provider
-        self.instance_gen = ontology_instance_generator.OntologyInstanceGenerator(kg_url=kg_url)
+        self.instance_gen = util.get_ontology_instance_generator(kg_url)
         self.qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
+        # the channels to be recorded are a static property of the component (KG) -> only queried once per component
+        self.channels_by_comp: Dict[str, Tuple[str, ...]] = {}
 
     @staticmethod
     def log_classification_actions(
@@ -87,11 +85,7 @@ class ClassifyComponents(smach.State):
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("CLASSIFY_COMPONENTS", "yellow", "on_grey", ["bold"]),
-              "state (applying trained model)..")
-        print("############################################")
+        util.log_state_banner("CLASSIFY_COMPONENTS", "state (applying trained model)..")
 
     def perform_synchronized_sensor_recordings(
             self, suggestion_list: Dict[str, Tuple[str, bool]]
@@ -107,19 +101,9 @@ class ClassifyComponents(smach.State):
         components_to_be_manually_verified = {k: v[0] for k, v in suggestion_list.items() if not v[1]}
         channels = {}
         for component in components_to_be_recorded.keys():
-            norm, model_id, input_len = self.qt.query_xcm_model_meta_info_by_component(component)[0]
-            model_instance = self.qt.query_model_by_model_id(model_id)[0]
-            model_uuid = model_instance.split("#")[1]
-            input_chan_req_resp = self.qt.query_input_chan_req_by_model(model_uuid)
-            assert len(input_chan_req_resp) > 0
-            comp_channels = np.empty(len(input_chan_req_resp), dtype=object)
-            for input_chan_req, req_idx in input_chan_req_resp:
-                input_chan_req_id = input_chan_req.split("#")[1]
-                req_chan = self.qt.query_channel_by_input_req(input_chan_req_id)
-                assert len(req_chan) == 1
-                req_chan_name = req_chan[0][1]
-                comp_channels[int(req_idx)] = req_chan_name
-            channels[component] = comp_channels
+            if component not in self.channels_by_comp:
+                self.channels_by_comp[component] = util.query_channels_by_component(self.qt, component)
+            channels[component] = self.channels_by_comp[component]
         print("------------------------------------------")
         print("components to be recorded:", components_to_be_recorded)
         print("components to be verified manually:", components_to_be_manually_verified)
@@ -169,24 +153,27 @@ class ClassifyComponents(smach.State):
         """
         voltages = list(voltage_dfs[0].to_numpy().flatten())
         net_input = util.construct_net_input(model, voltages)
-        # TODO: fake time vals -- actually just data points
-        time_vals = [i for i in range(len(voltages))]
-        prediction = model.predict(np.array([net_input]))
+        # direct call instead of `predict()`, which sets up a whole data pipeline for the single sample
+        prediction = model(np.array([net_input]), training=False).numpy()
 
         num_classes = len(prediction[0])
         # addresses both models with one output neuron and those with several
         anomaly = np.argmax(prediction) == 0 if num_classes > 1 else prediction[0][0] <= 0.5
         pred_value = prediction.max() if num_classes > 1 else prediction[0][0]
 
-        heatmaps = util.gen_heatmaps(net_input, model, prediction)
-        print("heatmap excerpt:", heatmaps["tf-keras-gradcam"][:5])
-        # TODO: which heatmap generation method result do we store here? for now, I'll use gradcam
-        heatmap_id = self.instance_gen.extend_knowledge_graph_with_heatmap(
-            "tf-keras-gradcam", heatmaps["tf-keras-gradcam"].tolist()
-        )
-        res_str = (" [ANOMALY" if anomaly else " [NO ANOMALY") + " - SCORE: " + str(pred_value) + "]"
-        heatmap_img = cam.gen_heatmaps_as_overlay(heatmaps, np.array(voltages), comp_name + res_str, time_vals)
-        self.data_provider.provide_heatmaps(heatmap_img, comp_name + res_str)
+        heatmap_id = ""
+        if GEN_HEATMAPS:
+            heatmaps = util.gen_heatmaps(net_input, model, prediction)
+            print("heatmap excerpt:", heatmaps["tf-keras-gradcam"][:5])
+            # TODO: which heatmap generation method result do we store here? for now, I'll use gradcam
+            heatmap_id = self.instance_gen.extend_knowledge_graph_with_heatmap(
+                "tf-keras-gradcam", heatmaps["tf-keras-gradcam"].tolist()
+            )
+            res_str = (" [ANOMALY" if anomaly else " [NO ANOMALY") + " - SCORE: " + str(pred_value) + "]"
+            # TODO: fake time vals -- actually just data points
+            time_vals = [i for i in range(len(voltages))]
+            heatmap_img = util.gen_heatmaps_overlay(heatmaps, np.array(voltages), comp_name + res_str, time_vals)
+            self.data_provider.provide_heatmaps(heatmap_img, comp_name + res_str)
         return anomaly, pred_value, heatmap_id
 
     def classify_with_torch_model(
@@ -207,7 +194,8 @@ class ClassifyComponents(smach.State):
         )
         tensor = torch.from_numpy(multivariate_sample).float()
         # assumes model outputs logits for a multi-class classification problem
-        logits = model(tensor)
+        with torch.inference_mode():  # inference only, i.e., no autograd tracking (incl. version counters)
+            logits = model(tensor)
         # convert logits to probabilities using softmax
         probas = torch.softmax(logits, dim=1)
         num_classes = len(probas[0])
@@ -216,43 +204,31 @@ class ClassifyComponents(smach.State):
         anomaly = int(torch.argmax(probas, dim=1)) == 0 if num_classes > 1 else probas[0][0] <= 0.5
         pred_value = float(probas.max()) if num_classes > 1 else probas[0][0]
 
-        # heatmap generation for torch model (XCM)
         heatmap_id = ""
-        xcm_model = XCM(c_in=len(voltage_dfs), c_out=2, seq_len=multivariate_sample.shape[2])
-        xcm_model.load_state_dict(model.state_dict())
-        assert type(xcm_model) == XCM
-        # XCM's builtin way of displaying heatmaps
-        # xcm_model.show_gradcam(tensor, TensorCategory(pred_value), figsize=(1920, 1080))
-
-        att_maps = get_attribution_map(
-            xcm_model, [xcm_model.conv2dblock, xcm_model.conv1dblock], tensor, detach=True, apply_relu=True
-        )
-        att_maps[0] = (att_maps[0] - att_maps[0].min()) / (att_maps[0].max() - att_maps[0].min())
-        att_maps[1] = (att_maps[1] - att_maps[1].min()) / (att_maps[1].max() - att_maps[1].min())
-
-        var_attr_heatmaps = {"var. attr. map " + str(i): att_maps[0].numpy()[i] for i in range(len(voltage_dfs))}
-        # plot_multi_chan_heatmaps_as_overlay(
-        #     var_attr_heatmaps, tensor[0].numpy(), 'test_plot', list(range(len(tensor[0, 0]))), True
-        # )
-        time_attr_heatmaps = {"time attr. map " + str(i): att_maps[1].numpy()[i] for i in range(len(voltage_dfs))}
-        # plot_multi_chan_heatmaps_as_overlay(
-        #     time_attr_heatmaps, tensor[0].numpy(), 'test_plot', list(range(len(tensor[0, 0]))), False
-        # )
-
-        for i in range(len(var_attr_heatmaps)):
-            heatmap_id = self.instance_gen.extend_knowledge_graph_with_heatmap(
-                "XCM GradCAM", var_attr_heatmaps["var. attr. map " + str(i)].tolist()
-            )
-        res_str = (" [ANOMALY" if anomaly else " [NO ANOMALY") + " - SCORE: " + str(pred_value) + "]"
+        if GEN_HEATMAPS:
+            # heatmap generation for torch model (XCM)
+            var_attr_heatmaps, time_attr_heatmaps = util.gen_xcm_attribution_maps(model, tensor)
+            # plot_multi_chan_heatmaps_as_overlay(
+            #     var_attr_heatmaps, tensor[0].numpy(), 'test_plot', list(range(len(tensor[0, 0]))), True
+            # )
+            # plot_multi_chan_heatmaps_as_overlay(
+            #     time_attr_heatmaps, tensor[0].numpy(), 'test_plot', list(range(len(tensor[0, 0]))), False
+            # )
+
+            for i in range(len(var_attr_heatmaps)):
+                heatmap_id = self.instance_gen.extend_knowledge_graph_with_heatmap(
+                    "XCM GradCAM", var_attr_heatmaps["var. attr. map " + str(i)].tolist()
+                )
+            res_str = (" [ANOMALY" if anomaly else " [NO ANOMALY") + " - SCORE: " + str(pred_value) + "]"
 
-        var_attr_heatmap_img = cam.gen_multi_chan_heatmaps_as_overlay(
-            var_attr_heatmaps, tensor[0].numpy(), comp_name + res_str, list(range(len(tensor[0, 0])))
-        )
-        time_attr_heatmap_img = cam.gen_multi_chan_heatmaps_as_overlay(
-            time_attr_heatmaps, tensor[0].numpy(), comp_name + res_str, list(range(len(tensor[0, 0])))
-        )
-        self.data_provider.provide_heatmaps(var_attr_heatmap_img, comp_name + res_str + "_var_attr")
-        self.data_provider.provide_heatmaps(time_attr_heatmap_img, comp_name + res_str + "_time_attr")
+            var_attr_heatmap_img = util.gen_multi_chan_heatmaps_overlay(
+                var_attr_heatmaps, tensor[0].numpy(), comp_name + res_str, list(range(len(tensor[0, 0])))
+            )
+            time_attr_heatmap_img = util.gen_multi_chan_heatmaps_overlay(
+                time_attr_heatmaps, tensor[0].numpy(), comp_name + res_str, list(range(len(tensor[0, 0])))
+            )
+            self.data_provider.provide_heatmaps(var_attr_heatmap_img, comp_name + res_str + "_var_attr")
+            self.data_provider.provide_heatmaps(time_attr_heatmap_img, comp_name + res_str + "_time_attr")
 
         # TODO: generally, we would want to store all heatmap IDs, i.e., for all channels
         return anomaly, pred_value, heatmap_id
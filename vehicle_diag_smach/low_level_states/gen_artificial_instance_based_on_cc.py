@@ -2,11 +2,9 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
-import os
-
 import smach
-from termcolor import colored
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_provider import DataProvider
 
@@ -34,10 +32,7 @@ class GenArtificialInstanceBasedOnCC(smach.State):
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("GEN_ARTIFICIAL_INSTANCE_BASED_ON_CC", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################")
+        util.log_state_banner("GEN_ARTIFICIAL_INSTANCE_BASED_ON_CC")
 
     def execute(self, userdata: smach.user_data.Remapper) -> str:
         """
@@ -8,8 +8,6 @@ import os
 import random
 from typing import Union, List, Tuple, Dict
 
-import matplotlib.pyplot as plt
-import networkx as nx
 import numpy as np
 import pandas as pd
 import smach
@@ -17,17 +15,13 @@ import torch
 from PIL import Image
 from matplotlib.lines import Line2D
 from obd_ontology import knowledge_graph_query_tool
-from obd_ontology import ontology_instance_generator
-from oscillogram_classification import cam
 from oscillogram_classification import preprocess
 from tensorflow import keras
 from termcolor import colored
-from tsai.all import get_attribution_map
-from tsai.models.XCM import XCM
 
 from vehicle_diag_smach import util
 from vehicle_diag_smach.config import SESSION_DIR, SUGGESTION_SESSION_FILE, OSCI_SESSION_FILES, \
-    CLASSIFICATION_LOG_FILE, FAULT_PATH_TMP_FILE, SELECTED_OSCILLOGRAMS, FINAL_DEMO_TEST_SAMPLES
+    CLASSIFICATION_LOG_FILE, FAULT_PATH_TMP_FILE, SELECTED_OSCILLOGRAMS, FINAL_DEMO_TEST_SAMPLES, GEN_HEATMAPS
 from vehicle_diag_smach.data_types.oscillogram_data import OscillogramData
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_accessor import DataAccessor
@@ -60,10 +54,12 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
                              input_keys=['classified_components'],
                              output_keys=['fault_paths'])
         self.qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
-        self.instance_gen = ontology_instance_generator.OntologyInstanceGenerator(kg_url=kg_url)
+        self.instance_gen = util.get_ontology_instance_generator(kg_url)
         self.data_accessor = data_accessor
         self.model_accessor = model_accessor
         self.data_provider = data_provider
+        # the input channels are a static property of the model (KG) -> only queried once per model
+        self.channels_by_model: Dict[str, Tuple[str, ...]] = {}
 
     @staticmethod
     def create_session_data_dir() -> None:
@@ -74,6 +70,17 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
         if not os.path.exists(osci_iso_session_dir):
             os.makedirs(osci_iso_session_dir)
 
+    def get_channels_by_model(self, model_id: str) -> Tuple[str, ...]:
+        """
+        Retrieves the input channels of the specified model (queried once per model).
+
+        :param model_id: ID of the model to retrieve the input channels for
+        :return: names of the input channels (ordered by input channel index)
+        """
+        if model_id not in self.channels_by_model:
+            self.channels_by_model[model_id] = util.query_channels_by_model(self.qt, model_id)
+        return self.channels_by_model[model_id]
+
     def get_model_and_metadata(
             self, affecting_comp: str, voltage_dfs: List[pd.DataFrame], sub_comp: bool = False
     ) -> Tuple[Union[keras.models.Model, torch.nn.Module], dict]:
@@ -119,7 +126,7 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
         title = affecting_comp + "_" + res_str
         # TODO: fake time vals -- actually just data points
         time_vals = [i for i in range(len(voltages))]
-        heatmap_img = cam.gen_heatmaps_as_overlay(heatmaps, np.array(voltages), title, time_vals)
+        heatmap_img = util.gen_heatmaps_overlay(heatmaps, np.array(voltages), title, time_vals)
         self.data_provider.provide_heatmaps(heatmap_img, title)
 
     def classify_with_keras_model(
@@ -136,20 +143,23 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
         """
         voltages = list(voltage_dfs[0].to_numpy().flatten())
         net_input = util.construct_net_input(model, voltages)
-        prediction = model.predict(np.array([net_input]))
+        # direct call instead of `predict()`, which sets up a whole data pipeline for the single sample
+        prediction = model(np.array([net_input]), training=False).numpy()
         num_classes = len(prediction[0])
         pred_value = prediction.max() if num_classes > 1 else prediction[0][0]
         # addresses both models with one output neuron and those with several
         anomaly = np.argmax(prediction) == 0 if num_classes > 1 else prediction[0][0] <= 0.5
 
-        heatmaps = util.gen_heatmaps(net_input, model, prediction)
-        print("DTC to set heatmap for:", dtc, "\nheatmap excerpt:", heatmaps["tf-keras-gradcam"][:5])
-        # TODO: which heatmap generation method result do we store here? for now, I'll use gradcam
-        heatmap_id = self.instance_gen.extend_knowledge_graph_with_heatmap(
-            "tf-keras-gradcam", heatmaps["tf-keras-gradcam"].tolist()
-        )
-        res_str = (" [ANOMALY" if anomaly else " [NO ANOMALY") + " - SCORE: " + str(prediction[0][0]) + "]"
-        self.provide_heatmaps(affecting_comp, res_str, heatmaps, voltages)
+        heatmap_id = ""
+        if GEN_HEATMAPS:
+            heatmaps = util.gen_heatmaps(net_input, model, prediction)
+            print("DTC to set heatmap for:", dtc, "\nheatmap excerpt:", heatmaps["tf-keras-gradcam"][:5])
+            # TODO: which heatmap generation method result do we store here? for now, I'll use gradcam
+            heatmap_id = self.instance_gen.extend_knowledge_graph_with_heatmap(
+                "tf-keras-gradcam", heatmaps["tf-keras-gradcam"].tolist()
+            )
+            res_str = (" [ANOMALY" if anomaly else " [NO ANOMALY") + " - SCORE: " + str(prediction[0][0]) + "]"
+            self.provide_heatmaps(affecting_comp, res_str, heatmaps, voltages)
         return anomaly, pred_value, heatmap_id
 
     def classify_with_torch_model(
@@ -170,7 +180,8 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
         )
         tensor = torch.from_numpy(multivariate_sample).float()
         # assumes model outputs logits for a multi-class classification problem
-        logits = model(tensor)
+        with torch.inference_mode():  # inference only, i.e., no autograd tracking (incl. version counters)
+            logits = model(tensor)
         # convert logits to probabilities using softmax
         probas = torch.softmax(logits, dim=1)
         num_classes = len(probas[0])
@@ -179,45 +190,33 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
         anomaly = int(torch.argmax(probas, dim=1)) == 0 if num_classes > 1 else probas[0][0] <= 0.5
         pred_value = float(probas.max()) if num_classes > 1 else probas[0][0]
 
-        # heatmap generation for torch model (XCM)
         heatmap_id = ""
-        xcm_model = XCM(c_in=len(voltage_dfs), c_out=2, seq_len=multivariate_sample.shape[2])
-        xcm_model.load_state_dict(model.state_dict())
-        assert type(xcm_model) == XCM
-        # XCM's builtin way of displaying heatmaps
-        # xcm_model.show_gradcam(tensor, TensorCategory(pred_value), figsize=(1920, 1080))
-
-        att_maps = get_attribution_map(
-            xcm_model, [xcm_model.conv2dblock, xcm_model.conv1dblock], tensor, detach=True, apply_relu=True
-        )
-        att_maps[0] = (att_maps[0] - att_maps[0].min()) / (att_maps[0].max() - att_maps[0].min())
-        att_maps[1] = (att_maps[1] - att_maps[1].min()) / (att_maps[1].max() - att_maps[1].min())
-
-        var_attr_heatmaps = {"var. attr. map " + str(i): att_maps[0].numpy()[i] for i in range(len(voltage_dfs))}
-        # plot_multi_chan_heatmaps_as_overlay(
-        #     var_attr_heatmaps, tensor[0].numpy(), 'test_plot', list(range(len(tensor[0, 0]))), True
-        # )
-        time_attr_heatmaps = {"time attr. map " + str(i): att_maps[1].numpy()[i] for i in range(len(voltage_dfs))}
-        # plot_multi_chan_heatmaps_as_overlay(
-        #     time_attr_heatmaps, tensor[0].numpy(), 'test_plot', list(range(len(tensor[0, 0]))), False
-        # )
-
-        for i in range(len(var_attr_heatmaps)):
-            heatmap_id = self.instance_gen.extend_knowledge_graph_with_heatmap(
-                "XCM GradCAM", var_attr_heatmaps["var. attr. map " + str(i)].tolist()
-            )
-        res_str = (" [ANOMALY" if anomaly else " [NO ANOMALY") + " - SCORE: " + str(pred_value) + "]"
+        if GEN_HEATMAPS:
+            # heatmap generation for torch model (XCM)
+            var_attr_heatmaps, time_attr_heatmaps = util.gen_xcm_attribution_maps(model, tensor)
+            # plot_multi_chan_heatmaps_as_overlay(
+            #     var_attr_heatmaps, tensor[0].numpy(), 'test_plot', list(range(len(tensor[0, 0]))), True
+            # )
+            # plot_multi_chan_heatmaps_as_overlay(
+            #     time_attr_heatmaps, tensor[0].numpy(), 'test_plot', list(range(len(tensor[0, 0]))), False
+            # )
+
+            for i in range(len(var_attr_heatmaps)):
+                heatmap_id = self.instance_gen.extend_knowledge_graph_with_heatmap(
+                    "XCM GradCAM", var_attr_heatmaps["var. attr. map " + str(i)].tolist()
+                )
+            res_str = (" [ANOMALY" if anomaly else " [NO ANOMALY") + " - SCORE: " + str(pred_value) + "]"
 
-        # TODO: could use actual time values instead of list(range(len(tensor[0, 0]))
-        var_attr_heatmap_img = cam.gen_multi_chan_heatmaps_as_overlay(
-            var_attr_heatmaps, tensor[0].numpy(), comp_name + res_str, list(range(len(tensor[0, 0])))
-        )
-        # TODO: could use actual time values instead of list(range(len(tensor[0, 0]))
-        time_attr_heatmap_img = cam.gen_multi_chan_heatmaps_as_overlay(
-            time_attr_heatmaps, tensor[0].numpy(), comp_name + res_str, list(range(len(tensor[0, 0])))
-        )
-        self.data_provider.provide_heatmaps(var_attr_heatmap_img, comp_name + res_str + "_var_attr")
-        self.data_provider.provide_heatmaps(time_attr_heatmap_img, comp_name + res_str + "_time_attr")
+            # TODO: could use actual time values instead of list(range(len(tensor[0, 0]))
+            var_attr_heatmap_img = util.gen_multi_chan_heatmaps_overlay(
+                var_attr_heatmaps, tensor[0].numpy(), comp_name + res_str, list(range(len(tensor[0, 0])))
+            )
+            # TODO: could use actual time values instead of list(range(len(tensor[0, 0]))
+            time_attr_heatmap_img = util.gen_multi_chan_heatmaps_overlay(
+                time_attr_heatmaps, tensor[0].numpy(), comp_name + res_str, list(range(len(tensor[0, 0])))
+            )
+            self.data_provider.provide_heatmaps(var_attr_heatmap_img, comp_name + res_str + "_var_attr")
+            self.data_provider.provide_heatmaps(time_attr_heatmap_img, comp_name + res_str + "_time_attr")
         # TODO: generally, we would want to store all heatmap IDs, i.e., for all channels
         return anomaly, pred_value, heatmap_id
 
@@ -256,19 +255,8 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
         model, model_meta_info = self.get_model_and_metadata(affecting_comp, voltage_dfs, sub_comp)
 
         if sub_comp:
-            model_instance = self.qt.query_model_by_model_id(model_meta_info["model_id"])[0]
-            model_uuid = model_instance.split("#")[1]
-            input_chan_req_resp = self.qt.query_input_chan_req_by_model(model_uuid)
-            assert len(input_chan_req_resp) > 0
-            idx = 0
-            for input_chan_req, req_idx in input_chan_req_resp:
-                input_chan_req_id = input_chan_req.split("#")[1]
-                req_chan = self.qt.query_channel_by_input_req(input_chan_req_id)
-                assert len(req_chan) == 1
-                req_chan_name = req_chan[0][1]
-                if req_chan_name == affecting_comp:
-                    idx = int(req_idx)
-                    break
+            model_channels = self.get_channels_by_model(model_meta_info["model_id"])
+            idx = model_channels.index(affecting_comp) if affecting_comp in model_channels else 0
             voltage_dfs = [voltage_dfs[idx]]
 
         for df in range(len(voltage_dfs)):
@@ -433,6 +421,10 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
         :param explicitly_considered_links: links that have been verified explicitly
         :return: causal graph visualizations
         """
+        # only imported when required, i.e., on visualizing isolation results (pyplot / networkx are heavy imports)
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
         visualizations = []
         for key in anomalous_paths.keys():
             print("isolation results, i.e., causal path:\n", key, ":", anomalous_paths[key])
@@ -535,10 +527,7 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("ISOLATE_PROBLEM_CHECK_EFFECTIVE_RADIUS", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################\n")
+        util.log_state_banner("ISOLATE_PROBLEM_CHECK_EFFECTIVE_RADIUS")
 
     def retrieve_already_checked_components(self, classified_components: List[str]) -> Dict[str, Tuple[bool, str]]:
         """
@@ -787,18 +776,8 @@ class IsolateProblemCheckEffectiveRadius(smach.State):
             if use_oscilloscope:
                 print("use oscilloscope..")
                 try:
-                    norm, model_id, input_len = self.qt.query_xcm_model_meta_info_by_component(comp_to_be_checked)[0]
-                    model_instance = self.qt.query_model_by_model_id(model_id)[0]
-                    model_uuid = model_instance.split("#")[1]
-                    input_chan_req_resp = self.qt.query_input_chan_req_by_model(model_uuid)
-                    assert len(input_chan_req_resp) > 0
-                    comp_channels = np.empty(len(input_chan_req_resp), dtype=object)
-                    for input_chan_req, req_idx in input_chan_req_resp:
-                        input_chan_req_id = input_chan_req.split("#")[1]
-                        req_chan = self.qt.query_channel_by_input_req(input_chan_req_id)
-                        assert len(req_chan) == 1
-                        req_chan_name = req_chan[0][1]
-                        comp_channels[int(req_idx)] = req_chan_name
+                    _, model_id, _ = self.qt.query_xcm_model_meta_info_by_component(comp_to_be_checked)[0]
+                    comp_channels = self.get_channels_by_model(model_id)
                     print(colored(f"- {comp_to_be_checked}: channels to be recorded - {list(comp_channels)} ", "green",
                                   "on_grey", ["bold"]))
                 except ValueError:
@@ -2,11 +2,9 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
-import os
-
 import smach
-from termcolor import colored
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_accessor import DataAccessor
 from vehicle_diag_smach.interfaces.data_provider import DataProvider
@@ -35,10 +33,7 @@ class NoProblemDetectedCheckSensor(smach.State):
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("NO_PROBLEM_DETECTED_CHECK_SENSOR", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################")
+        util.log_state_banner("NO_PROBLEM_DETECTED_CHECK_SENSOR")
 
     def execute(self, userdata: smach.user_data.Remapper) -> str:
         """
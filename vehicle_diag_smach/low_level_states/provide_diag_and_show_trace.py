@@ -3,13 +3,13 @@
 # @author Tim Bohne
 
 import json
-import os
-from typing import Dict, List, Union
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Union, Optional
 
 import smach
 from obd_ontology import ontology_instance_generator, knowledge_graph_query_tool
-from termcolor import colored
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.config import SESSION_DIR, OBD_INFO_FILE, CLASSIFICATION_LOG_FILE, SUGGESTION_SESSION_FILE
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_provider import DataProvider
@@ -33,16 +33,19 @@ class ProvideDiagAndShowTrace(smach.State):
         self.data_provider = data_provider
         self.instance_gen = ontology_instance_generator.OntologyInstanceGenerator(kg_url=kg_url)
         self.qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
+        # the diag log is entered into the KG in the background - nothing in the diagnosis depends on it;
+        # the worker gets its own generator and query tool, they are not shared across threads
+        self.diag_log_uploader = ThreadPoolExecutor(max_workers=1)
+        self.upload_instance_gen = ontology_instance_generator.OntologyInstanceGenerator(kg_url=kg_url)
+        self.upload_qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
+        self.pending_upload: Optional[Future] = None
 
     @staticmethod
     def log_state_info() -> None:
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("PROVIDE_DIAG_AND_SHOW_TRACE", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################")
+        util.log_state_banner("PROVIDE_DIAG_AND_SHOW_TRACE")
 
     @staticmethod
     def construct_fault_paths(diagnosis: Dict[str, List[List[str]]], anomalous_comp: str) -> List[str]:
@@ -103,12 +106,40 @@ class ProvideDiagAndShowTrace(smach.State):
 
     def read_vehicle_id(self, obd_data: Dict[str, Union[str, List[str]]]) -> str:
         """
-        Queries the vehicle ID based on the provided OBD data.
+        Queries the vehicle ID based on the provided OBD data (used by the diag log upload).
 
         :param obd_data: OBD data to query vehicle ID for
         :return: vehicle ID
         """
-        return self.qt.query_vehicle_instance_by_vin(obd_data["vin"])[0].split("#")[1]
+        return self.upload_qt.query_vehicle_instance_by_vin(obd_data["vin"])[0].split("#")[1]
+
+    def upload_diag_log(
+            self, data: Dict[str, Union[int, str]], obd_data: Dict[str, Union[str, List[str]]],
+            fault_path_ids: List[str], classification_ids: List[str]
+    ) -> None:
+        """
+        Extends the knowledge graph with the `DiagLog` of the performed diagnosis.
+
+        :param data: metadata dictionary
+        :param obd_data: OBD data dictionary
+        :param fault_path_ids: IDs of the fault paths of the diagnosis
+        :param classification_ids: IDs of the classifications performed in the diagnosis
+        """
+        vehicle_id = self.read_vehicle_id(obd_data)
+        self.upload_instance_gen.extend_knowledge_graph_with_diag_log(
+            data["diag_date"], data["max_num_of_parallel_rec"], obd_data["dtc_list"], fault_path_ids,
+            classification_ids, vehicle_id
+        )
+
+    @staticmethod
+    def log_failed_upload(upload: Future) -> None:
+        """
+        Logs errors that occurred while uploading the diag log in the background.
+
+        :param upload: finished diag log upload
+        """
+        if upload.exception() is not None:
+            util.log_err("failed to enter diag log into the KG: " + str(upload.exception()))
 
     def execute(self, userdata: smach.user_data.Remapper) -> str:
         """
@@ -116,7 +147,8 @@ class ProvideDiagAndShowTrace(smach.State):
 
         Enters the diagnosis into the KG. It is important to log the whole context - everything that could be meaningful
         in the long run, this is where we collect the data that we initially lacked, e.g., for automated data-driven
-        RCA.
+        RCA. The fault paths are entered right away, the diag log is entered in the background (possibly still pending
+        when the state returns).
 
         :param userdata: input of state
         :return: outcome of the state ("uploaded_diag")
@@ -136,17 +168,20 @@ class ProvideDiagAndShowTrace(smach.State):
 
         self.data_provider.provide_diagnosis(list(fault_paths.values()))
         userdata.final_output = list(fault_paths.values())
-        self.data_provider.provide_state_transition(StateTransition(
-            "PROVIDE_DIAG_AND_SHOW_TRACE", "diag", "uploaded_diag"
-        ))
 
+        # session files are read right away, they are replaced by the next diagnosis
         data = self.read_metadata()
         obd_data = self.read_obd_data()
         classification_ids = self.read_classification_ids()
-        vehicle_id = self.read_vehicle_id(obd_data)
-
-        self.instance_gen.extend_knowledge_graph_with_diag_log(
-            data["diag_date"], data["max_num_of_parallel_rec"], obd_data["dtc_list"], list(fault_paths.keys()),
-            classification_ids, vehicle_id
+        if self.pending_upload is not None:
+            # at most one pending upload - errors of the previous one are already logged
+            wait([self.pending_upload])
+        self.pending_upload = self.diag_log_uploader.submit(
+            self.upload_diag_log, data, obd_data, list(fault_paths.keys()), classification_ids
         )
+        self.pending_upload.add_done_callback(self.log_failed_upload)
+        print("\nentering diag log into the KG in the background..")
+        self.data_provider.provide_state_transition(StateTransition(
+            "PROVIDE_DIAG_AND_SHOW_TRACE", "diag", "uploaded_diag"
+        ))
         return "uploaded_diag"
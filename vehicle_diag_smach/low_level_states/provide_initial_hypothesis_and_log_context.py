@@ -3,13 +3,12 @@
 # @author Tim Bohne
 
 import json
-import os
 from typing import Dict, Union, List
 
 import smach
-from obd_ontology import knowledge_graph_query_tool, ontology_instance_generator
-from termcolor import colored
+from obd_ontology import knowledge_graph_query_tool
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.config import SESSION_DIR, OBD_INFO_FILE, CLASSIFICATION_LOG_FILE
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_provider import DataProvider
@@ -30,7 +29,7 @@ class ProvideInitialHypothesisAndLogContext(smach.State):
         """
         smach.State.__init__(self, outcomes=['no_diag'], input_keys=[''], output_keys=['final_output'])
         self.data_provider = data_provider
-        self.instance_gen = ontology_instance_generator.OntologyInstanceGenerator(kg_url=kg_url)
+        self.instance_gen = util.get_ontology_instance_generator(kg_url)
         self.qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
 
     @staticmethod
@@ -38,11 +37,7 @@ class ProvideInitialHypothesisAndLogContext(smach.State):
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("PROVIDE_INITIAL_HYPOTHESIS_AND_LOG_CONTEXT", "yellow", "on_grey", ["bold"]),
-              "state..")
-        print("############################################")
+        util.log_state_banner("PROVIDE_INITIAL_HYPOTHESIS_AND_LOG_CONTEXT")
 
     @staticmethod
     def read_metadata() -> Dict[str, Union[int, str]]:
@@ -3,7 +3,6 @@
 # @author Tim Bohne
 
 import json
-import os
 from typing import List
 
 import smach
@@ -57,10 +56,7 @@ class SelectBestUnusedErrorCodeInstance(smach.State):
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("SELECT_BEST_UNUSED_ERROR_CODE_INSTANCE", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################")
+        util.log_state_banner("SELECT_BEST_UNUSED_ERROR_CODE_INSTANCE")
 
     @staticmethod
     def load_customer_complaints() -> List[str]:
@@ -87,32 +83,37 @@ class SelectBestUnusedErrorCodeInstance(smach.State):
             "SELECT_BEST_UNUSED_ERROR_CODE_INSTANCE", "GEN_ARTIFICIAL_INSTANCE_BASED_ON_CC", "no_instance"
         ))
 
-    def dtc_match(self, dtc_list: List[str], dtc: str) -> None:
+    def dtc_match(self, dtc_list: List[str], idx: int) -> str:
         """
         Handles the case of a matching DTC instance.
 
         :param dtc_list: list of DTCs
-        :param dtc: matching DTC
+        :param idx: index of the matching DTC
+        :return: matching DTC
         """
-        dtc_list.remove(dtc)
+        dtc = dtc_list.pop(idx)
         self.remove_dtc_instance_from_tmp_file(dtc_list)
         print("select matching instance (OBD, CC)..")
         self.data_provider.provide_state_transition(StateTransition(
             "SELECT_BEST_UNUSED_ERROR_CODE_INSTANCE", "SUGGEST_SUSPECT_COMPONENTS", "selected_matching_instance(OBD_CC)"
         ))
+        return dtc
 
-    def no_matching_instance(self, dtc_list: List[str]) -> None:
+    def no_matching_instance(self, dtc_list: List[str]) -> str:
         """
         Handles 'no match' cases.
 
         :param dtc_list: list of DTCs
+        :return: selected DTC
         """
-        dtc_list.remove(dtc_list[0])
+        # TODO: select best remaining DTC instance based on some criteria
+        dtc = dtc_list.pop(0)
         self.remove_dtc_instance_from_tmp_file(dtc_list)
         print("DTCs and customer complaints available, but no matching instance..")
         self.data_provider.provide_state_transition(StateTransition(
             "SELECT_BEST_UNUSED_ERROR_CODE_INSTANCE", "SUGGEST_SUSPECT_COMPONENTS", "no_matching_selected_best_instance"
         ))
+        return dtc
 
     def no_remaining_instances_and_customer_complaints_used(self) -> None:
         """
@@ -124,14 +125,15 @@ class SelectBestUnusedErrorCodeInstance(smach.State):
             "no_instance_and_CC_already_used"
         ))
 
-    def no_customer_complaints_but_remaining_dtcs(self, dtc_list: List[str], selected_dtc: str) -> None:
+    def no_customer_complaints_but_remaining_dtcs(self, dtc_list: List[str]) -> str:
         """
         Handles cases with no customer complaints, but remaining DTCs.
 
         :param dtc_list: list of DTCs
-        :param selected_dtc: selected DTC
+        :return: selected DTC
         """
-        dtc_list.remove(selected_dtc)
+        # TODO: select best remaining DTC instance based on some criteria
+        selected_dtc = dtc_list.pop(0)
         self.remove_dtc_instance_from_tmp_file(dtc_list)
         print("\nno customer complaints available, selecting DTC instance..")
         print(colored("selected DTC instance: " + selected_dtc, "green", "on_grey", ["bold"]))
@@ -139,6 +141,7 @@ class SelectBestUnusedErrorCodeInstance(smach.State):
             "SELECT_BEST_UNUSED_ERROR_CODE_INSTANCE", "SUGGEST_SUSPECT_COMPONENTS",
             "no_matching_selected_best_instance"
         ))
+        return selected_dtc
 
     def execute(self, userdata: smach.user_data.Remapper) -> str:
         """
@@ -159,24 +162,18 @@ class SelectBestUnusedErrorCodeInstance(smach.State):
             return "no_instance"
         # case 2: both available
         elif len(dtc_list) > 0 and len(customer_complaints_list) == 1:
-            for dtc in dtc_list:
-                match = True  # TODO: check whether DTC matches CC
+            for i, dtc in enumerate(dtc_list):
+                match = True  # TODO: check whether `dtc` matches CC
                 if match:  # sub-case 1: matching instance
-                    self.dtc_match(dtc_list, dtc)
-                    userdata.selected_instance = dtc
+                    userdata.selected_instance = self.dtc_match(dtc_list, i)
                     return "selected_matching_instance(OBD_CC)"
             # sub-case 2: no matching instance -> select best instance
-            # TODO: select best remaining DTC instance based on some criteria
-            userdata.selected_instance = dtc_list[0]
-            self.no_matching_instance(dtc_list)
+            userdata.selected_instance = self.no_matching_instance(dtc_list)
             return "no_matching_selected_best_instance"
         # case 3: no remaining instance and customer complaints already used
         elif len(dtc_list) == 0 and len(customer_complaints_list) == 0:
             self.no_remaining_instances_and_customer_complaints_used()
             return "no_instance_and_CC_already_used"
         else:  # case 4: no customer complaints, but remaining DTCs
-            # TODO: select best remaining DTC instance based on some criteria
-            selected_dtc = dtc_list[0]
-            userdata.selected_instance = selected_dtc
-            self.no_customer_complaints_but_remaining_dtcs(dtc_list, selected_dtc)
+            userdata.selected_instance = self.no_customer_complaints_but_remaining_dtcs(dtc_list)
             return "no_matching_selected_best_instance"
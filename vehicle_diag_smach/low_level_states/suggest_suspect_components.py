@@ -10,6 +10,7 @@ import smach
 from obd_ontology import knowledge_graph_query_tool
 from termcolor import colored
 
+from vehicle_diag_smach import util
 from vehicle_diag_smach.config import SESSION_DIR, SUS_COMP_TMP_FILE, SUGGESTION_SESSION_FILE
 from vehicle_diag_smach.data_types.state_transition import StateTransition
 from vehicle_diag_smach.interfaces.data_provider import DataProvider
@@ -34,16 +35,15 @@ class SuggestSuspectComponents(smach.State):
                              output_keys=['suggestion_list'])
         self.data_provider = data_provider
         self.qt = knowledge_graph_query_tool.KnowledgeGraphQueryTool(kg_url=kg_url)
+        # the oscilloscope usage is a static property of the component (KG) -> only queried once per component
+        self.oscilloscope_usage_by_comp: Dict[str, bool] = {}
 
     @staticmethod
     def log_state_info() -> None:
         """
         Logs the state information.
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n\n############################################")
-        print("executing", colored("SUGGEST_SUSPECT_COMPONENTS", "yellow", "on_grey", ["bold"]), "state..")
-        print("############################################\n")
+        util.log_state_banner("SUGGEST_SUSPECT_COMPONENTS")
 
     @staticmethod
     def write_components_to_file(suspect_components: List[str]) -> None:
@@ -77,29 +77,30 @@ class SuggestSuspectComponents(smach.State):
         with open(SESSION_DIR + "/" + SUGGESTION_SESSION_FILE, 'w') as f:
             json.dump(suggestion, f, default=str)
 
-    def determine_oscilloscope_usage(self, suspect_components: List[str]) -> List[bool]:
+    def determine_oscilloscope_usage(self, suspect_components: List[str]) -> Dict[str, bool]:
         """
         Decides whether an oscilloscope is required / feasible for each component.
 
         :param suspect_components: components to determine oscilloscope usage for
-        :return: booleans representing oscilloscope usage for each component
+        :return: oscilloscope usage for each component ({comp: osci_usage})
         """
-        oscilloscope_usage = []
+        oscilloscope_usage = {}
         for comp in suspect_components:
-            use = self.qt.query_oscilloscope_usage_by_suspect_component(comp)[0]
+            if comp not in self.oscilloscope_usage_by_comp:
+                self.oscilloscope_usage_by_comp[comp] = self.qt.query_oscilloscope_usage_by_suspect_component(comp)[0]
+            use = self.oscilloscope_usage_by_comp[comp]
             print("comp:", comp, "// use oscilloscope:", use)
-            oscilloscope_usage.append(use)
+            oscilloscope_usage[comp] = use
         return oscilloscope_usage
 
     def gen_suggestions(
-            self, selected_instance: str, suspect_components: List[str], oscilloscope_usage: List[bool]
+            self, selected_instance: str, oscilloscope_usage: Dict[str, bool]
     ) -> Dict[str, Tuple[str, bool]]:
         """
         Generates the suggestion dictionary: {comp: (reason_for, anomaly)}.
 
         :param selected_instance: selected DTC instance
-        :param suspect_components: suggested suspect components
-        :param oscilloscope_usage: oscilloscope usage for the suggested components
+        :param oscilloscope_usage: oscilloscope usage for the suggested components ({comp: osci_usage})
         :return: suggestion dictionary
         """
         return {
@@ -107,7 +108,7 @@ class SuggestSuspectComponents(smach.State):
                 self.qt.query_diag_association_instance_by_dtc_and_sus_comp(
                     selected_instance, comp
                 )[0].split("#")[1], osci
-            ) for comp, osci in zip(suspect_components, oscilloscope_usage)
+            ) for comp, osci in oscilloscope_usage.items()
         }
 
     @staticmethod
@@ -144,11 +145,11 @@ class SuggestSuspectComponents(smach.State):
         print(colored("SUSPECT COMPONENTS: " + str(suspect_components) + "\n", "green", "on_grey", ["bold"]))
         self.write_suggestions_to_session_file(userdata.selected_instance, suspect_components)
         oscilloscope_usage = self.determine_oscilloscope_usage(suspect_components)
-        suggestions = self.gen_suggestions(userdata.selected_instance, suspect_components, oscilloscope_usage)
+        suggestions = self.gen_suggestions(userdata.selected_instance, oscilloscope_usage)
         userdata.suggestion_list = suggestions
         self.update_session_file(suspect_components, suggestions)
 
-        if True in oscilloscope_usage:
+        if any(oscilloscope_usage.values()):
             print("\n--> there is at least one suspect component that can be diagnosed using an oscilloscope..")
         else:
             print("\n--> none of the identified suspect components can be diagnosed with an oscilloscope..")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lxml import etree
+
+from vehicle_diag_smach.high_level_states.establish_initial_hypothesis import EstablishInitialHypothesis
+
+SESSION_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<session{namespace}>
+    <solution objectName="NoHeuristicRating">
+        <rating type="established"/>
+    </solution>
+    <solution objectName="FirstHeuristicRating">
+        <rating type="heuristic"/>
+    </solution>
+    <solution objectName="SecondHeuristicRating">
+        <rating type="heuristic"/>
+    </solution>
+</session>
+"""
+
+SESSION_XML_WITHOUT_HEURISTIC_RATING = """<?xml version="1.0" encoding="UTF-8"?>
+<session>
+    <solution objectName="NoHeuristicRating">
+        <rating type="established"/>
+    </solution>
+</session>
+"""
+
+NON_HEURISTIC_SOLUTION = """    <solution objectName="NoHeuristicRating{idx}">
+        <rating type="established"/>
+    </solution>
+"""
+
+
+class TestEstablishInitialHypothesis(unittest.TestCase):
+    """
+    Tests the parsing of the initial hypothesis from the customer complaints (XPS) session file.
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def write_session_file(self, content: str) -> str:
+        """
+        Writes the specified content to a session file in the temporary directory.
+
+        :param content: content of the session file
+        :return: path to the session file
+        """
+        session_file = os.path.join(self.tmp_dir.name, "xps_session.xml")
+        with open(session_file, "w") as f:
+            f.write(content)
+        return session_file
+
+    def test_first_heuristic_rating(self) -> None:
+        """
+        Tests that the hypothesis is the `objectName` of the element containing the first heuristic rating.
+        """
+        session_file = self.write_session_file(SESSION_XML.format(namespace=""))
+        self.assertEqual(EstablishInitialHypothesis.parse_initial_hypothesis(session_file), "FirstHeuristicRating")
+
+    def test_no_heuristic_rating(self) -> None:
+        """
+        Tests that there is no hypothesis if the session file does not contain a heuristic rating.
+        """
+        session_file = self.write_session_file(SESSION_XML_WITHOUT_HEURISTIC_RATING)
+        self.assertIsNone(EstablishInitialHypothesis.parse_initial_hypothesis(session_file))
+
+    def test_default_namespace(self) -> None:
+        """
+        Tests that the ratings are also found if the session file uses a default namespace.
+        """
+        session_file = self.write_session_file(SESSION_XML.format(namespace=' xmlns="http://example.org/xps"'))
+        self.assertEqual(EstablishInitialHypothesis.parse_initial_hypothesis(session_file), "FirstHeuristicRating")
+
+    def test_malformed_session_file(self) -> None:
+        """
+        Tests that a session file that is truncated before the first heuristic rating is rejected.
+        """
+        session_file = self.write_session_file(SESSION_XML.format(namespace="")[:150])
+        with self.assertRaises(etree.XMLSyntaxError):
+            EstablishInitialHypothesis.parse_initial_hypothesis(session_file)
+
+    def test_processed_solutions_are_freed(self) -> None:
+        """
+        Tests that the already processed solutions are dropped from the session while streaming the session file.
+        """
+        non_heuristic_solutions = "".join(NON_HEURISTIC_SOLUTION.format(idx=i) for i in range(10000))
+        session_file = self.write_session_file(
+            SESSION_XML.format(namespace="").replace("<session>\n", "<session>\n" + non_heuristic_solutions)
+        )
+        last_elem = []
+        iterparse = etree.iterparse
+
+        def recording_iterparse(*args, **kwargs):
+            for event, elem in iterparse(*args, **kwargs):
+                last_elem[:] = [elem]
+                yield event, elem
+
+        with mock.patch.object(etree, 'iterparse', recording_iterparse):
+            hypothesis = EstablishInitialHypothesis.parse_initial_hypothesis(session_file)
+        self.assertEqual(hypothesis, "FirstHeuristicRating")
+        session = last_elem[0].getroottree().getroot()
+        # the remaining solution has already been read ahead by the parser
+        self.assertEqual(len(session), 2)
+        self.assertEqual(session[0].get('objectName'), "FirstHeuristicRating")
+
+
+if __name__ == '__main__':
+    unittest.main()
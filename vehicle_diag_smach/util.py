@@ -2,18 +2,25 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
+import functools
 import json
-from typing import Dict, List, Tuple
+import os
+from types import ModuleType
+from typing import Dict, List, Tuple, TYPE_CHECKING
 
 import numpy as np
-from oscillogram_classification import cam
+from obd_ontology import ontology_instance_generator, knowledge_graph_query_tool
 from oscillogram_classification import preprocess
 from tensorflow import keras
 from termcolor import colored
 
-from vehicle_diag_smach.config import SESSION_DIR, DTC_TMP_FILE
+from vehicle_diag_smach.config import SESSION_DIR, DTC_TMP_FILE, DEMO_PAUSES
 from vehicle_diag_smach.data_types.oscillogram_data import OscillogramData
 
+if TYPE_CHECKING:  # only required for annotations - torch and PIL are heavy imports only needed for the heatmaps
+    import torch
+    from PIL.Image import Image
+
 
 def validate_keras_model(model: keras.models.Model) -> None:
     """
@@ -105,7 +112,8 @@ def construct_net_input(model: keras.models.Model, voltages: List[float]) -> np.
     :param voltages: input voltage values (time series) to be reshaped
     :return: constructed / reshaped input
     """
-    net_input_size = model.layers[0].output_shape[0][1]
+    # input shape of the model: (None, len_of_ts, 1)
+    net_input_size = model.input_shape[1]
     assert net_input_size == len(voltages)
     net_input = np.asarray(voltages).astype('float32')
     return net_input.reshape((net_input.shape[0], 1))
@@ -133,6 +141,18 @@ def log_regular(pred_value: float) -> None:
     print("#####################################")
 
 
+def import_cam() -> ModuleType:
+    """
+    Imports the `cam` module (heatmap generation and visualization).
+
+    It is only imported when required, i.e., on heatmap generation, because matplotlib is a heavy import.
+
+    :return: `cam` module
+    """
+    from oscillogram_classification import cam
+    return cam
+
+
 def gen_heatmaps(net_input: np.ndarray, model: keras.models.Model, prediction: np.ndarray) -> Dict[str, np.ndarray]:
     """
     Generates the heatmaps (visual explanations) for the classification.
@@ -142,10 +162,123 @@ def gen_heatmaps(net_input: np.ndarray, model: keras.models.Model, prediction: n
     :param prediction: prediction, i.e., outcome of the model
     :return: dictionary of different heatmaps
     """
-    return {"tf-keras-gradcam": cam.tf_keras_gradcam(np.array([net_input]), model, prediction),
-            "tf-keras-gradcam++": cam.tf_keras_gradcam_plus_plus(np.array([net_input]), model, prediction),
-            "tf-keras-scorecam": cam.tf_keras_scorecam(np.array([net_input]), model, prediction),
-            "tf-keras-layercam": cam.tf_keras_layercam(np.array([net_input]), model, prediction)}
+    cam = import_cam()
+    batch = np.array([net_input])
+    return {"tf-keras-gradcam": cam.tf_keras_gradcam(batch, model, prediction),
+            "tf-keras-gradcam++": cam.tf_keras_gradcam_plus_plus(batch, model, prediction),
+            "tf-keras-scorecam": cam.tf_keras_scorecam(batch, model, prediction),
+            "tf-keras-layercam": cam.tf_keras_layercam(batch, model, prediction)}
+
+
+def gen_xcm_attribution_maps(
+        model: "torch.nn.Module", tensor: "torch.Tensor"
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Generates the (normalized) variable and time attribution maps (heatmaps) of the XCM model for the classification.
+
+    :param model: trained torch (XCM) model
+    :param tensor: classified multivariate sample - shape: (1, chan, length)
+    :return: (variable attribution maps, time attribution maps) - one per channel
+    """
+    # only imported when required, i.e., on heatmap generation (tsai is a heavy import)
+    from tsai.all import get_attribution_map
+    from tsai.models.XCM import XCM
+
+    num_of_chan = tensor.shape[1]
+    xcm_model = XCM(c_in=num_of_chan, c_out=2, seq_len=tensor.shape[2])
+    xcm_model.load_state_dict(model.state_dict())
+    assert type(xcm_model) == XCM
+    # XCM's builtin way of displaying heatmaps
+    # xcm_model.show_gradcam(tensor, TensorCategory(pred_value), figsize=(1920, 1080))
+
+    att_maps = get_attribution_map(
+        xcm_model, [xcm_model.conv2dblock, xcm_model.conv1dblock], tensor, detach=True, apply_relu=True
+    )
+    att_maps[0] = (att_maps[0] - att_maps[0].min()) / (att_maps[0].max() - att_maps[0].min())
+    att_maps[1] = (att_maps[1] - att_maps[1].min()) / (att_maps[1].max() - att_maps[1].min())
+
+    var_attr_heatmaps = {"var. attr. map " + str(i): att_maps[0].numpy()[i] for i in range(num_of_chan)}
+    time_attr_heatmaps = {"time attr. map " + str(i): att_maps[1].numpy()[i] for i in range(num_of_chan)}
+    return var_attr_heatmaps, time_attr_heatmaps
+
+
+def gen_heatmaps_overlay(
+        heatmaps: Dict[str, np.ndarray], voltages: np.ndarray, title: str, time_vals: List[float]
+) -> "Image":
+    """
+    Generates the visualization of the heatmaps as overlay of the classified (univariate) time series.
+
+    :param heatmaps: heatmaps to be visualized
+    :param voltages: classified voltage values (time series)
+    :param title: title of the visualization
+    :param time_vals: time values of the time series
+    :return: heatmap visualization
+    """
+    return import_cam().gen_heatmaps_as_overlay(heatmaps, voltages, title, time_vals)
+
+
+def gen_multi_chan_heatmaps_overlay(
+        heatmaps: Dict[str, np.ndarray], voltages: np.ndarray, title: str, time_vals: List[float]
+) -> "Image":
+    """
+    Generates the visualization of the heatmaps as overlay of the classified (multivariate) time series.
+
+    :param heatmaps: heatmaps to be visualized (one per channel)
+    :param voltages: classified voltage values (one time series per channel)
+    :param title: title of the visualization
+    :param time_vals: time values of the time series
+    :return: heatmap visualization
+    """
+    return import_cam().gen_multi_chan_heatmaps_as_overlay(heatmaps, voltages, title, time_vals)
+
+
+@functools.lru_cache(maxsize=None)
+def get_ontology_instance_generator(kg_url: str) -> ontology_instance_generator.OntologyInstanceGenerator:
+    """
+    Provides the ontology instance generator for the specified knowledge graph.
+
+    The generator is only constructed once per knowledge graph and shared by the states of the diagnosis.
+    States that extend the knowledge graph in the background have to construct their own generator.
+
+    :param kg_url: URL of the knowledge graph to be extended
+    :return: ontology instance generator
+    """
+    return ontology_instance_generator.OntologyInstanceGenerator(kg_url=kg_url)
+
+
+def query_channels_by_model(qt: knowledge_graph_query_tool.KnowledgeGraphQueryTool, model_id: str) -> Tuple[str, ...]:
+    """
+    Queries the channels required as input by the specified model.
+
+    :param qt: query tool of the calling state
+    :param model_id: ID of the model to query the input channels for
+    :return: names of the input channels (ordered by input channel index)
+    """
+    model_instance = qt.query_model_by_model_id(model_id)[0]
+    model_uuid = model_instance.split("#")[1]
+    input_chan_req_resp = qt.query_input_chan_req_by_model(model_uuid)
+    assert len(input_chan_req_resp) > 0
+    channels = np.empty(len(input_chan_req_resp), dtype=object)
+    for input_chan_req, req_idx in input_chan_req_resp:
+        input_chan_req_id = input_chan_req.split("#")[1]
+        req_chan = qt.query_channel_by_input_req(input_chan_req_id)
+        assert len(req_chan) == 1
+        channels[int(req_idx)] = req_chan[0][1]
+    return tuple(channels)
+
+
+def query_channels_by_component(
+        qt: knowledge_graph_query_tool.KnowledgeGraphQueryTool, component: str
+) -> Tuple[str, ...]:
+    """
+    Queries the channels to be recorded for the specified component, i.e., the input channels of its XCM model.
+
+    :param qt: query tool of the calling state
+    :param component: component to query the channels for
+    :return: names of the channels to be recorded (ordered by input channel index)
+    """
+    _, model_id, _ = qt.query_xcm_model_meta_info_by_component(component)[0]
+    return query_channels_by_model(qt, model_id)
 
 
 def load_dtc_instances() -> List[str]:
@@ -160,13 +293,42 @@ def load_dtc_instances() -> List[str]:
 
 def artificial_demo_pause() -> None:
     """
-    Introduces an artificial pause to the diag process for presentation purposes.
+    Introduces an artificial pause to the diag process for presentation purposes (only if `DEMO_PAUSES` is set).
     """
+    if not DEMO_PAUSES:
+        return
     val = None
     while val != "":
         val = input("\n..............................")
 
 
+def clear_screen() -> None:
+    """
+    Clears the terminal screen.
+
+    On POSIX systems, the corresponding escape sequences are written directly instead of spawning a `clear` process.
+    """
+    if os.name == 'nt':
+        os.system('cls')
+    else:
+        print("\033[H\033[2J", end="", flush=True)
+
+
+def log_state_banner(state_name: str, details: str = "state..", clear: bool = True) -> None:
+    """
+    Clears the screen and logs the banner of the entered state (as a single write).
+
+    :param state_name: name of the entered state
+    :param details: details following the state name
+    :param clear: whether the screen is cleared before logging the banner
+    """
+    if clear:
+        clear_screen()
+    print("\n\n############################################\n"
+          + "executing " + colored(state_name, "yellow", "on_grey", ["bold"]) + " " + details
+          + "\n############################################")
+
+
 def log_info(msg) -> None:
     """
     Custom logging to override defaults.